@@ -0,0 +1,242 @@
+"""
+離線批次 walk-forward 預測。
+
+    cd app
+    python batch_forecast.py data/ --output output/batch --workers 4
+
+- 只讀取需要的欄位 (CSV: usecols / Parquet: columns)
+- 以 process pool 分派檔案，每個 worker 只載入一次模型
+- 依 run_date / symbol 寫出 Hive 分區 Parquet，已完成的 symbol 會自動略過
+"""
+import argparse
+import datetime
+import multiprocessing
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+INPUT_SUFFIXES = (".csv", ".parquet")
+
+# 每個 worker process 各自持有一份模型
+_pipeline = None
+
+
+def _init_worker(device_map):
+    global _pipeline
+    from routers.stock_prediction import load_pipeline
+
+    _pipeline = load_pipeline(device_map=device_map)
+
+
+def discover_inputs(paths):
+    """展開目錄，回傳排序後的 CSV / Parquet 檔案清單"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                if name.lower().endswith(INPUT_SUFFIXES):
+                    files.append(os.path.join(path, name))
+        elif path.lower().endswith(INPUT_SUFFIXES):
+            files.append(path)
+        else:
+            raise ValueError(f"不支援的輸入檔案格式: {path}")
+    return sorted(set(files))
+
+
+def symbol_from_path(path):
+    # NYSE%3ATR.csv -> NYSE:TR
+    return unquote(os.path.splitext(os.path.basename(path))[0])
+
+
+def partition_dir(output, table, run_date, symbol):
+    return os.path.join(output, table, f"run_date={run_date}",
+                        f"symbol={quote(symbol, safe='')}")
+
+
+def read_series(path, value_column, time_column=None):
+    """只讀取 value_column (與可選的 time_column)，回傳 oldest -> newest"""
+    wanted = [c for c in (time_column, value_column) if c]
+
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, usecols=lambda c: c in wanted)
+    else:
+        import pyarrow.parquet as pq
+
+        names = pq.read_schema(path).names
+        df = pd.read_parquet(path, columns=[c for c in wanted if c in names])
+
+    if value_column not in df.columns:
+        raise KeyError(f"{path} 缺少欄位 {value_column}")
+    if time_column in df.columns:
+        df = df.sort_values(time_column, kind="stable")
+
+    df = df.dropna(subset=[value_column]).reset_index(drop=True)
+    times = df[time_column].to_numpy() if time_column in df.columns else None
+    return df[value_column].to_numpy(dtype=float), times
+
+
+def compute_metrics(true_values, pred_values):
+    true_arr = np.asarray(true_values, dtype=float)
+    pred_arr = np.asarray(pred_values, dtype=float)
+    err = pred_arr - true_arr
+
+    from routers.stock_prediction import cosine_similarity
+
+    # 實際值為 0 的點不計入 MAPE
+    nonzero = true_arr != 0
+    mape = (float(np.mean(np.abs(err[nonzero] / true_arr[nonzero])))
+            if nonzero.any() else float("nan"))
+    return {
+        "n_points": int(true_arr.size),
+        "mae": float(np.mean(np.abs(err))),
+        "rmse": float(np.sqrt(np.mean(err ** 2))),
+        "mape": mape,
+        "sim": cosine_similarity(true_arr, pred_arr),
+    }
+
+
+def _write_parquet(df, directory):
+    # 先寫暫存檔再 rename，確保中斷時不會留下不完整的分區
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, "part-0.parquet")
+    tmp = target + ".tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, target)
+
+
+def forecast_file(path, output, run_date, value_column, time_column,
+                  context_length, prediction_length, max_length):
+    """單一檔案的 walk-forward 評估 (在 worker 中執行)"""
+    from routers.stock_prediction import walk_forward
+
+    symbol = symbol_from_path(path)
+    data, times = read_series(path, value_column, time_column)
+
+    # 與 long_term_eval 相同：資料太長只保留最近的部分
+    if max_length and data.shape[0] > max_length:
+        data = data[-max_length:]
+        if times is not None:
+            times = times[-max_length:]
+
+    if len(data) < context_length + prediction_length:
+        raise ValueError(
+            f"{symbol} 只有 {len(data)} 筆資料，"
+            f"不足 context_length + prediction_length")
+
+    true_values, pred_values = walk_forward(
+        _pipeline, data, context_length, prediction_length)
+
+    n = len(true_values)
+    offset = np.arange(n)
+    forecasts = pd.DataFrame({
+        "index": context_length + offset,
+        "window": offset // prediction_length,
+        "step": offset % prediction_length + 1,
+        "actual": true_values,
+        "predict": pred_values,
+    })
+    if times is not None:
+        forecasts.insert(
+            0, time_column, times[context_length:context_length + n])
+
+    metrics = pd.DataFrame([{
+        "source": os.path.basename(path),
+        "context_length": context_length,
+        "prediction_length": prediction_length,
+        "n_windows": n // prediction_length,
+        **compute_metrics(true_values, pred_values),
+    }])
+
+    _write_parquet(forecasts,
+                   partition_dir(output, "forecasts", run_date, symbol))
+    # metrics 最後寫入，作為該 symbol 完成的標記
+    _write_parquet(metrics,
+                   partition_dir(output, "metrics", run_date, symbol))
+    return symbol, metrics.iloc[0]["sim"]
+
+
+def is_done(output, run_date, path):
+    directory = partition_dir(output, "metrics", run_date,
+                              symbol_from_path(path))
+    return os.path.exists(os.path.join(directory, "part-0.parquet"))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Chronos 離線批次 walk-forward 預測")
+    parser.add_argument("inputs", nargs="+",
+                        help="CSV / Parquet 檔案或目錄 (檔名即 symbol)")
+    parser.add_argument("--output", default="batch_output",
+                        help="Parquet 輸出根目錄")
+    parser.add_argument("--run-date",
+                        default=datetime.date.today().isoformat(),
+                        help="分區日期，沿用同一日期即可續跑")
+    parser.add_argument("--column", default="close", help="預測目標欄位")
+    parser.add_argument("--time-column", default="time",
+                        help="時間欄位 (若存在則一併輸出)")
+    parser.add_argument("--context-length", type=int, default=192)
+    parser.add_argument("--prediction-length", type=int, default=12)
+    parser.add_argument("--max-length", type=int, default=3000,
+                        help="每個檔案最多使用最近幾筆資料，0 表示不限制")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--device", default="cuda",
+                        help="模型 device_map，例如 cuda / cpu")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="不略過已完成的 symbol")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    files = discover_inputs(args.inputs)
+    if not args.overwrite:
+        pending = [f for f in files
+                   if not is_done(args.output, args.run_date, f)]
+        if len(pending) < len(files):
+            print(f"⏭️ 略過 {len(files) - len(pending)} 個已完成的檔案")
+        files = pending
+
+    if not files:
+        print("✅ 沒有需要處理的檔案")
+        return 0
+
+    print(f"🟡 共 {len(files)} 個檔案，使用 {args.workers} 個 worker")
+
+    failed = []
+    # CUDA 無法在 fork 出的子行程中初始化，一律使用 spawn
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(args.device,),
+    ) as pool:
+        futures = {
+            pool.submit(forecast_file, path, args.output, args.run_date,
+                        args.column, args.time_column, args.context_length,
+                        args.prediction_length, args.max_length): path
+            for path in files
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                symbol, sim = future.result()
+                print(f"✅ [{done}/{len(files)}] {symbol} sim={sim:.4f}")
+            except Exception:
+                failed.append(path)
+                print(f"❌ [{done}/{len(files)}] {path} 失敗：")
+                traceback.print_exc()
+
+    if failed:
+        print(f"⚠️ {len(failed)} 個檔案失敗，重新執行即可只處理未完成的部分")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
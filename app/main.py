@@ -14,7 +14,7 @@ if __name__ == "__main__":
         current_dir = os.path.dirname(os.path.abspath(__file__))
         cpath = os.path.join(current_dir, "NYSE%3ATR.csv")
 
-        ls = pd.read_csv(cpath)["close"]
+        ls = pd.read_csv(cpath, usecols=["close"])["close"]
 
         from routers.stock_prediction import (PredictRequest, long_term_eval)
         req = PredictRequest(
@@ -1,5 +1,10 @@
+import numpy as np
 import pandas as pd
 import pyodbc
+from routers.backtesting_module.indicators import compute_indicators
+
+PRICE_COLUMNS = ("datetime, open_price, high_price, low_price, "
+                 "close_price, volume")
 
 
 def get_trading_signals(
@@ -191,7 +196,7 @@ def get_trading_signals(
 def get_previous_stock_records_by_date(server, database, user, password,
                                        symbol, target_date,
                                        table="stock_data_1d"):
-    """取得指定股票在指定日期之前的最新一筆價格資料"""
+    """取得指定股票在指定日期之前的價格資料，並計算技術指標"""
     conn_str = (
         f"DRIVER={{ODBC Driver 17 for SQL Server}};"
         f"SERVER={server};DATABASE={database};UID={user};PWD={password};"
@@ -200,7 +205,7 @@ def get_previous_stock_records_by_date(server, database, user, password,
     )
 
     query = f"""
-        SELECT  *
+        SELECT  {PRICE_COLUMNS}
         FROM {table}
         WHERE symbol = ? AND datetime < ?
         ORDER BY datetime DESC
@@ -225,59 +230,18 @@ def get_previous_stock_records_by_date(server, database, user, password,
                                if "volume" in df.columns else 0.0)
                 })
 
-            # 技術指標
-            rsi_5 = df["rsi_5"].tolist()
-            rsi_7 = df["rsi_7"].tolist()
-            rsi_10 = df["rsi_10"].tolist()
-            rsi_14 = df["rsi_14"].tolist()
-            rsi_21 = df["rsi_21"].tolist()
-            macd = df["macd"].tolist()
-            dif = df["dif"].tolist()
-            macd_histogram = df["macd_histogram"].tolist()
-            rsv = df["rsv"].tolist()
-            k_value = df["k_value"].tolist()
-            d_value = df["d_value"].tolist()
-            j_value = df["j_value"].tolist()
-            ma5 = df["ma5"].tolist()
-            ma10 = df["ma10"].tolist()
-            ma20 = df["ma20"].tolist()
-            ma60 = df["ma60"].tolist()
-            ema12 = df["ema12"].tolist()
-            ema26 = df["ema26"].tolist()
-            bb_upper = df["bb_upper"].tolist()
-            bb_middle = df["bb_middle"].tolist()
-            bb_lower = df["bb_lower"].tolist()
-            atr = df["atr"].tolist()
-            cci = df["cci"].tolist()
-            willr = df["willr"].tolist()
-            mom = df["mom"].tolist()
-
+            # 技術指標：由 OHLC 即時計算 (需 oldest -> newest)，
+            # 再反轉回與 candlesticks 相同的 newest-first 順序
+            chronological = df.iloc[::-1]
+            indicators = compute_indicators(
+                chronological["high_price"].to_numpy(dtype=float),
+                chronological["low_price"].to_numpy(dtype=float),
+                chronological["close_price"].to_numpy(dtype=float),
+            )
             technical_indicator = {
-                "rsi_5": rsi_5,
-                "rsi_7": rsi_7,
-                "rsi_10": rsi_10,
-                "rsi_14": rsi_14,
-                "rsi_21": rsi_21,
-                "macd": macd,
-                "dif": dif,
-                "macd_histogram": macd_histogram,
-                "rsv": rsv,
-                "k_value": k_value,
-                "d_value": d_value,
-                "j_value": j_value,
-                "ma5": ma5,
-                "ma10": ma10,
-                "ma20": ma20,
-                "ma60": ma60,
-                "ema12": ema12,
-                "ema26": ema26,
-                "bb_upper": bb_upper,
-                "bb_middle": bb_middle,
-                "bb_lower": bb_lower,
-                "atr": atr,
-                "cci": cci,
-                "willr": willr,
-                "mom": mom,
+                name: [None if np.isnan(v) else float(v)
+                       for v in values[::-1]]
+                for name, values in indicators.items()
             }
 
             return {"candlesticks": candlesticks,
@@ -299,7 +263,7 @@ def get_after_stock_records_by_date(server, database, user, password, symbol,
     )
 
     query = f"""
-        SELECT  *
+        SELECT  {PRICE_COLUMNS}
         FROM {table}
         WHERE symbol = ? AND datetime > ?
         ORDER BY datetime ASC
@@ -0,0 +1,394 @@
+"""
+以 NumPy 向量化計算技術指標 (取代 stock_data_1d 中預先計算的指標欄位)。
+
+- compute_indicators: 由整段 OHLC 陣列一次算出所有指標
+- IncrementalIndicators: 新 K 線進來時逐根更新，每根成本與歷史長度無關
+
+輸入一律為 chronological (oldest -> newest)。兩者的遞迴指標 (EMA、Wilder
+平滑、KD) 皆以第一筆資料作為初始值，暖機期間輸出 NaN，因此對同一段資料
+批次計算與逐根更新的結果一致。
+"""
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_PARAMS = {
+    "rsi_periods": (5, 7, 10, 14, 21),
+    "ma_periods": (5, 10, 20, 60),
+    "ema_fast": 12,
+    "ema_slow": 26,
+    "macd_signal": 9,
+    "kd_period": 9,
+    "bb_period": 20,
+    "bb_std": 2.0,
+    "atr_period": 14,
+    "cci_period": 20,
+    "willr_period": 14,
+    "mom_period": 10,
+}
+
+# KD 的 K、D 以 1/3 權重平滑，初始值 50
+KD_ALPHA = 1 / 3
+KD_INIT = 50.0
+
+
+def _resolve_params(params):
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"未知的指標參數: {sorted(unknown)}")
+    return {**DEFAULT_PARAMS, **params}
+
+
+def _warmup(p):
+    """各指標第一個有效值的索引 (之前輸出 NaN)"""
+    warmup = {f"rsi_{n}": n for n in p["rsi_periods"]}
+    warmup.update({f"ma{n}": n - 1 for n in p["ma_periods"]})
+    warmup.update({
+        f"ema{p['ema_fast']}": p["ema_fast"] - 1,
+        f"ema{p['ema_slow']}": p["ema_slow"] - 1,
+        "dif": p["ema_slow"] - 1,
+        "macd": p["ema_slow"] + p["macd_signal"] - 2,
+        "macd_histogram": p["ema_slow"] + p["macd_signal"] - 2,
+        "rsv": p["kd_period"] - 1,
+        "k_value": p["kd_period"] - 1,
+        "d_value": p["kd_period"] - 1,
+        "j_value": p["kd_period"] - 1,
+        "bb_upper": p["bb_period"] - 1,
+        "bb_middle": p["bb_period"] - 1,
+        "bb_lower": p["bb_period"] - 1,
+        "atr": p["atr_period"],
+        "cci": p["cci_period"] - 1,
+        "willr": p["willr_period"] - 1,
+        "mom": p["mom_period"],
+    })
+    return warmup
+
+
+def _buffer_size(p):
+    return max(*p["ma_periods"], p["kd_period"], p["bb_period"],
+               p["cci_period"], p["willr_period"], p["mom_period"] + 1)
+
+
+def _ewm(x, alpha, init):
+    """
+    y[t] = (1 - alpha) * y[t-1] + alpha * x[t]，y[-1] = init。
+
+    分段以封閉解計算：段內 y[k] = d^(k+1) * s + alpha * d^k * cumsum(x / d^j)，
+    段長依衰減率決定，避免 d^-j 溢位。
+    """
+    x = np.asarray(x, dtype=float)
+    out = np.empty_like(x)
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = x
+        return out
+
+    block = max(1, min(len(x), int(300 / -np.log(decay))))
+    pw = decay ** np.arange(block + 1)
+    inv = decay ** -np.arange(block)
+
+    state = init
+    for start in range(0, len(x), block):
+        seg = x[start:start + block]
+        m = len(seg)
+        acc = np.cumsum(seg * inv[:m])
+        out[start:start + m] = pw[1:m + 1] * state + alpha * pw[:m] * acc
+        state = out[start + m - 1]
+    return out
+
+
+def _rolling(x, n, func):
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1:] = func(sliding_window_view(x, n), axis=-1)
+    return out
+
+
+def _rsv(close, hhv, llv):
+    rng = hhv - llv
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(rng == 0, 50.0, (close - llv) / rng * 100)
+
+
+def _willr(close, hhv, llv):
+    rng = hhv - llv
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(rng == 0, -50.0, (hhv - close) / rng * -100)
+
+
+def _rsi(avg_gain, avg_loss):
+    total = avg_gain + avg_loss
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total == 0, 50.0, avg_gain / total * 100)
+
+
+def _cci(window_tp, axis=-1):
+    # window_tp 的最後一軸為時間窗
+    mean = window_tp.mean(axis=axis)
+    mad = np.abs(window_tp - mean[..., None]).mean(axis=axis)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mad == 0, 0.0,
+                        (window_tp[..., -1] - mean) / (0.015 * mad))
+
+
+def _compute(high, low, close, p):
+    """回傳 (指標, 遞迴狀態)，狀態供 IncrementalIndicators 接續使用"""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    if not (len(high) == len(low) == n):
+        raise ValueError("high / low / close 長度不一致")
+
+    out = {}
+    state = {"count": n}
+    if n == 0:
+        return {k: np.empty(0) for k in _warmup(p)}, state
+
+    # --- RSI (Wilder) ---
+    delta = np.diff(close)
+    gain = np.maximum(delta, 0.0)
+    loss = np.maximum(-delta, 0.0)
+    state["rsi"] = {}
+    for period in p["rsi_periods"]:
+        rsi = np.full(n, np.nan)
+        if n > 1:
+            ag = _ewm(gain, 1 / period, gain[0])
+            al = _ewm(loss, 1 / period, loss[0])
+            rsi[1:] = _rsi(ag, al)
+            state["rsi"][period] = (ag[-1], al[-1])
+        out[f"rsi_{period}"] = rsi
+
+    # --- MA / EMA / MACD ---
+    for period in p["ma_periods"]:
+        out[f"ma{period}"] = _rolling(close, period, np.mean)
+
+    fast, slow = p["ema_fast"], p["ema_slow"]
+    ema_fast = _ewm(close, 2 / (fast + 1), close[0])
+    ema_slow = _ewm(close, 2 / (slow + 1), close[0])
+    dif = ema_fast - ema_slow
+    signal = _ewm(dif, 2 / (p["macd_signal"] + 1), dif[0])
+    out[f"ema{fast}"] = ema_fast
+    out[f"ema{slow}"] = ema_slow
+    out["dif"] = dif
+    out["macd"] = signal
+    out["macd_histogram"] = dif - signal
+    state.update(ema_fast=ema_fast[-1], ema_slow=ema_slow[-1],
+                 signal=signal[-1])
+
+    # --- KD ---
+    kd = p["kd_period"]
+    rsv = _rsv(close, _rolling(high, kd, np.max), _rolling(low, kd, np.min))
+    k_value = np.full(n, np.nan)
+    d_value = np.full(n, np.nan)
+    if n >= kd:
+        k_value[kd - 1:] = _ewm(rsv[kd - 1:], KD_ALPHA, KD_INIT)
+        d_value[kd - 1:] = _ewm(k_value[kd - 1:], KD_ALPHA, KD_INIT)
+        state.update(k=k_value[-1], d=d_value[-1])
+    out["rsv"] = rsv
+    out["k_value"] = k_value
+    out["d_value"] = d_value
+    out["j_value"] = 3 * k_value - 2 * d_value
+
+    # --- Bollinger Bands ---
+    bb_mid = _rolling(close, p["bb_period"], np.mean)
+    bb_dev = _rolling(close, p["bb_period"], np.std) * p["bb_std"]
+    out["bb_upper"] = bb_mid + bb_dev
+    out["bb_middle"] = bb_mid
+    out["bb_lower"] = bb_mid - bb_dev
+
+    # --- ATR (Wilder) ---
+    tr = high - low
+    if n > 1:
+        prev_close = close[:-1]
+        tr[1:] = np.maximum.reduce([tr[1:], np.abs(high[1:] - prev_close),
+                                    np.abs(low[1:] - prev_close)])
+    atr = _ewm(tr, 1 / p["atr_period"], tr[0])
+    out["atr"] = atr
+    state["atr"] = atr[-1]
+
+    # --- CCI / Williams %R / Momentum ---
+    tp = (high + low + close) / 3
+    out["cci"] = _rolling(tp, p["cci_period"], _cci)
+    wr = p["willr_period"]
+    out["willr"] = _willr(close, _rolling(high, wr, np.max),
+                          _rolling(low, wr, np.min))
+    mom = np.full(n, np.nan)
+    lag = p["mom_period"]
+    mom[lag:] = close[lag:] - close[:-lag] if lag else 0.0
+    out["mom"] = mom
+
+    for name, start in _warmup(p).items():
+        out[name][:start] = np.nan
+
+    size = _buffer_size(p)
+    state.update(high=high[-size:], low=low[-size:], close=close[-size:])
+    return out, state
+
+
+def compute_indicators(high, low, close, **params):
+    """
+    由 OHLC 陣列一次計算所有技術指標。
+
+    參數名稱與預設值見 DEFAULT_PARAMS，可覆寫任意組合；回傳 dict 的鍵與
+    stock_data_1d 的欄位名稱相同 (rsi_5、ma20、ema12 ... 依參數命名)。
+    """
+    out, _ = _compute(high, low, close, _resolve_params(params))
+    return out
+
+
+class IncrementalIndicators:
+    """
+    逐根 K 線更新的技術指標。
+
+    只保留遞迴狀態與最近 max(週期) 根 K 線，update() 的成本與歷史長度無關。
+    """
+
+    def __init__(self, **params):
+        self.params = _resolve_params(params)
+        self._warmup = _warmup(self.params)
+        size = _buffer_size(self.params)
+        self._high = deque(maxlen=size)
+        self._low = deque(maxlen=size)
+        self._close = deque(maxlen=size)
+        self._tp = deque(maxlen=self.params["cci_period"])
+        self.count = 0
+        self._rsi = {}
+        self._ema_fast = None
+        self._ema_slow = None
+        self._signal = None
+        self._k = KD_INIT
+        self._d = KD_INIT
+        self._atr = None
+
+    @classmethod
+    def from_history(cls, high, low, close, **params):
+        """以向量化方式計算歷史資料後，接續逐根更新"""
+        obj = cls(**params)
+        _, state = _compute(high, low, close, obj.params)
+        if state["count"] == 0:
+            return obj
+
+        obj.count = state["count"]
+        obj._high.extend(state["high"])
+        obj._low.extend(state["low"])
+        obj._close.extend(state["close"])
+        obj._tp.extend((state["high"] + state["low"] + state["close"]) / 3)
+        obj._rsi = dict(state["rsi"])
+        obj._ema_fast = state["ema_fast"]
+        obj._ema_slow = state["ema_slow"]
+        obj._signal = state["signal"]
+        obj._k = state.get("k", KD_INIT)
+        obj._d = state.get("d", KD_INIT)
+        obj._atr = state["atr"]
+        return obj
+
+    def _window(self, buf, n):
+        return np.fromiter(buf, dtype=float)[-n:]
+
+    def update(self, high, low, close):
+        """加入一根新 K 線，回傳該根 K 線的所有指標值"""
+        p = self.params
+        high, low, close = float(high), float(low), float(close)
+        prev_close = self._close[-1] if self._close else None
+        t = self.count
+
+        self._high.append(high)
+        self._low.append(low)
+        self._close.append(close)
+        self._tp.append((high + low + close) / 3)
+        self.count += 1
+
+        out = {}
+        closes = self._window(self._close, len(self._close))
+
+        # --- RSI (Wilder) ---
+        for period in p["rsi_periods"]:
+            if prev_close is None:
+                out[f"rsi_{period}"] = np.nan
+                continue
+            gain = max(close - prev_close, 0.0)
+            loss = max(prev_close - close, 0.0)
+            if period in self._rsi:
+                a = 1 / period
+                ag, al = self._rsi[period]
+                ag = (1 - a) * ag + a * gain
+                al = (1 - a) * al + a * loss
+            else:
+                ag, al = gain, loss
+            self._rsi[period] = (ag, al)
+            out[f"rsi_{period}"] = float(_rsi(ag, al))
+
+        # --- MA / EMA / MACD ---
+        for period in p["ma_periods"]:
+            out[f"ma{period}"] = (float(np.mean(closes[-period:]))
+                                  if t >= period - 1 else np.nan)
+
+        fast, slow = p["ema_fast"], p["ema_slow"]
+        if self._ema_fast is None:
+            self._ema_fast = self._ema_slow = close
+        else:
+            a_fast, a_slow = 2 / (fast + 1), 2 / (slow + 1)
+            self._ema_fast = (1 - a_fast) * self._ema_fast + a_fast * close
+            self._ema_slow = (1 - a_slow) * self._ema_slow + a_slow * close
+        dif = self._ema_fast - self._ema_slow
+        if self._signal is None:
+            self._signal = dif
+        else:
+            a = 2 / (p["macd_signal"] + 1)
+            self._signal = (1 - a) * self._signal + a * dif
+        out[f"ema{fast}"] = self._ema_fast
+        out[f"ema{slow}"] = self._ema_slow
+        out["dif"] = dif
+        out["macd"] = self._signal
+        out["macd_histogram"] = dif - self._signal
+
+        # --- KD ---
+        kd = p["kd_period"]
+        if t >= kd - 1:
+            rsv = float(_rsv(close, max(self._window(self._high, kd)),
+                             min(self._window(self._low, kd))))
+            self._k = (1 - KD_ALPHA) * self._k + KD_ALPHA * rsv
+            self._d = (1 - KD_ALPHA) * self._d + KD_ALPHA * self._k
+            out["rsv"] = rsv
+            out["k_value"] = self._k
+            out["d_value"] = self._d
+            out["j_value"] = 3 * self._k - 2 * self._d
+
+        # --- Bollinger Bands ---
+        bb = p["bb_period"]
+        if t >= bb - 1:
+            window = closes[-bb:]
+            mid = float(np.mean(window))
+            dev = float(np.std(window)) * p["bb_std"]
+            out["bb_upper"] = mid + dev
+            out["bb_middle"] = mid
+            out["bb_lower"] = mid - dev
+
+        # --- ATR (Wilder) ---
+        tr = high - low
+        if prev_close is not None:
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+        if self._atr is None:
+            self._atr = tr
+        else:
+            a = 1 / p["atr_period"]
+            self._atr = (1 - a) * self._atr + a * tr
+        out["atr"] = self._atr
+
+        # --- CCI / Williams %R / Momentum ---
+        cci = p["cci_period"]
+        if t >= cci - 1:
+            out["cci"] = float(_cci(self._window(self._tp, cci)))
+        wr = p["willr_period"]
+        if t >= wr - 1:
+            out["willr"] = float(_willr(
+                close, max(self._window(self._high, wr)),
+                min(self._window(self._low, wr))))
+        lag = p["mom_period"]
+        if t >= lag:
+            out["mom"] = close - closes[-lag - 1]
+
+        return {name: (out.get(name, np.nan) if t >= start else np.nan)
+                for name, start in self._warmup.items()}
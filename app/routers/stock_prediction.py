@@ -17,15 +17,65 @@ class PredictRequest(BaseModel):
     prediction_length: int = 12
 
 
+def get_model_path():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(
+        current_dir, "..", "output", "gooood", "checkpoint-final")
+
+
+def load_pipeline(device_map="cuda"):
+    """載入 Chronos 模型（API 與離線批次共用）"""
+    return BaseChronosPipeline.from_pretrained(
+        pretrained_model_name_or_path=get_model_path(),
+        device_map=device_map,
+        torch_dtype=torch.bfloat16,
+    )
+
+
+def walk_forward(pipeline, data, context_length, prediction_length):
+    """
+    以 prediction_length 為步長做 walk-forward 預測。
+    data 需為 chronological (oldest -> newest)，
+    回傳 (true_values, pred_values) 兩個等長 list。
+    """
+    lens = len(data)
+    index = context_length
+    true_values = []
+    pred_values = []
+
+    # index 以 chronological (oldest->newest) 的位置前進
+    while index <= lens - prediction_length:
+        context_data = data[index - context_length: index].tolist()
+        context_tensor = torch.tensor(
+            context_data, dtype=torch.float32).unsqueeze(0)
+
+        quantiles, mean = pipeline.predict_quantiles(
+            context=context_tensor,
+            prediction_length=prediction_length,
+            quantile_levels=[0.1, 0.5, 0.9],
+        )
+
+        true_val = data[index: index + prediction_length].tolist()
+
+        true_values.extend(true_val)
+        pred_values.extend(np.asarray(mean[0]).tolist())
+
+        index += prediction_length
+
+    return true_values, pred_values
+
+
+def cosine_similarity(true_values, pred_values):
+    # 計算 cosine similarity，避免除以零
+    true_arr = np.array(true_values, dtype=float)
+    pred_arr = np.array(pred_values, dtype=float)
+    denom = (norm(true_arr) * norm(pred_arr)) + 1e-9
+    return float(np.dot(true_arr, pred_arr) / denom)
+
+
 @router.post('/predict')
 def predict(req: PredictRequest):
     try:
-        import os
-
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(
-            current_dir, "..", "output", "gooood", "checkpoint-final")
-
         # 轉為 numpy 並確保時序為 oldest -> newest
         data = np.array(req.data_numpy, dtype=float)
         # 前端 DB 查詢通常是 DESC (newest first)，反向成 chronological
@@ -34,11 +84,7 @@ def predict(req: PredictRequest):
         if lens < req.context_length + 1:
             raise Exception("Not enough data to evaluate")
 
-        pipeline = BaseChronosPipeline.from_pretrained(
-            pretrained_model_name_or_path=model_path,
-            device_map="cuda",
-            torch_dtype=torch.bfloat16,
-        )
+        pipeline = load_pipeline()
 
         # 取最後面的 context_length（最近的序列）
         context_data = data[-req.context_length:].tolist()
@@ -72,48 +118,15 @@ def long_term_eval(req: PredictRequest):
         if data.shape[0] > 3000:
             data = data[-3000:]
 
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(
-            current_dir, "..", "output", "gooood", "checkpoint-final")
-
         lens = len(data)
         if lens < req.context_length + req.prediction_length:
             raise Exception("Not enough data to perform long term evaluation")
 
-        pipeline = BaseChronosPipeline.from_pretrained(
-            pretrained_model_name_or_path=model_path,
-            device_map="cuda",
-            torch_dtype=torch.bfloat16,
-        )
-
-        index = req.context_length
-        true_values = []
-        pred_values = []
-
-        # index 以 chronological (oldest->newest) 的位置前進
-        while index <= lens - req.prediction_length:
-            context_data = data[index - req.context_length: index].tolist()
-            context_tensor = torch.tensor(
-                context_data, dtype=torch.float32).unsqueeze(0)
-
-            quantiles, mean = pipeline.predict_quantiles(
-                context=context_tensor,
-                prediction_length=req.prediction_length,
-                quantile_levels=[0.1, 0.5, 0.9],
-            )
-
-            true_val = data[index: index + req.prediction_length].tolist()
-
-            true_values.extend(true_val)
-            pred_values.extend(np.asarray(mean[0]).tolist())
-
-            index += req.prediction_length
+        pipeline = load_pipeline()
 
-        # 計算 cosine similarity，避免除以零
-        true_arr = np.array(true_values, dtype=float)
-        pred_arr = np.array(pred_values, dtype=float)
-        denom = (norm(true_arr) * norm(pred_arr)) + 1e-9
-        con_sim = float(np.dot(true_arr, pred_arr) / denom)
+        true_values, pred_values = walk_forward(
+            pipeline, data, req.context_length, req.prediction_length)
+        con_sim = cosine_similarity(true_values, pred_values)
 
         return {"predict": pred_values,
                 "true_value": true_values,